@@ -37,22 +37,34 @@ if not dfs:
 data = pd.concat(dfs, ignore_index=True)
 
 # === CLEANUP ===
-# Replace commas with dots (for any locale issues)
-for col in data.columns:
-    if data[col].dtype == object:
-        data[col] = data[col].astype(str).str.replace(",", ".")
-# Convert numeric columns
-for col in data.columns[2:]:
-    data[col] = pd.to_numeric(data[col], errors="coerce")
+# Replace commas with dots (for any locale issues) and convert numeric
+# columns in one pass; columns that are already numeric are left as is
+def to_numeric(col):
+    if pd.api.types.is_numeric_dtype(col):
+        return col
+    return pd.to_numeric(col.astype(str).str.replace(",", "."), errors="coerce")
+
+text_cols = {"dtype", "kernel", "source_file"}
+num_cols = [c for c in data.columns[2:] if c not in text_cols]
+data[num_cols] = data[num_cols].apply(to_numeric)
+
+# Python rows may come from different kernels (numpy / python): plot them apart.
+# Older CSVs have no kernel column; those rows were all pure-Python timings.
+if "kernel" not in data.columns:
+    data["kernel"] = pd.NA
+data.loc[(data["lang"] == "python") & data["kernel"].isna(), "kernel"] = "python"
+data["series"] = data["lang"]
+has_kernel = data["kernel"].notna()
+data.loc[has_kernel, "series"] = data["lang"] + " (" + data["kernel"] + ")"
 
 print("\nData loaded successfully.")
 
 # === PLOT 1: Execution Time vs Matrix Size ===
 plt.figure(figsize=(8, 6))
-for lang, grp in data.groupby("lang"):
+for (series, lang), grp in data.groupby(["series", "lang"]):
     plt.plot(
         grp["size"], grp["avg_time_ms"],
-        marker="o", linewidth=2, label=lang.upper()
+        marker="o", linewidth=2, label=series.upper()
     )
 
 plt.title("Matrix Multiplication Performance Comparison")
@@ -78,15 +90,15 @@ mem_map = {
     "python": "psutil_peak_rss_mb"  # or "tracemalloc_peak_mib"
 }
 
-for lang, grp in data.groupby("lang"):
+for (series, lang), grp in data.groupby(["series", "lang"]):
     col = mem_map.get(lang.lower())
     if col in grp.columns:
         plt.plot(
             grp["size"], grp[col],
-            marker="s", linewidth=2, label=f"{lang.upper()} ({col})"
+            marker="s", linewidth=2, label=f"{series.upper()} ({col})"
         )
     else:
-        print(f"No memory column found for {lang}")
+        print(f"No memory column found for {series}")
 
 plt.title("Peak Memory Usage Comparison")
 plt.xlabel("Matrix size (N)")
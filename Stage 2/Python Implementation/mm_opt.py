@@ -1,137 +1,249 @@
-import argparse, random, time, statistics, csv, datetime, os
+import argparse, random, time, statistics, datetime, os, json, platform
+from pathlib import Path
 import psutil, tracemalloc
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+try:
+    from numba import njit, prange
+except ImportError:  # matmul_blocked falls back to the NumPy slice kernel
+    njit, prange = None, range
+try:
+    from mm_kernel import matmul_blocked_c  # build: python setup.py build_ext --inplace
+except ImportError:  # matmul_basic falls back to the NumPy row axpy
+    matmul_blocked_c = None
 
 BASE_SEED = 403086
+BS_CANDIDATES = [16, 32, 48, 64, 96, 128, 192]
+BS_CACHE = Path.home() / ".mm_bs_cache.json"
 
-def gen_dense(n, seed):
-    rnd = random.Random(seed)
-    return [[rnd.random() for _ in range(n)] for __ in range(n)]
+def gen_dense(n, seed, dtype=np.float64):
+    return np.random.default_rng(seed).random((n, n), dtype=dtype)
 
-def gen_sparse_csr(n, density, seed):
+def gen_sparse_csr(n, density, seed, dtype=np.float64):
     """Return CSR (row_ptr, col_idx, vals) for an n x n matrix with given density (0..1)."""
-    rnd = random.Random(seed)
-    row_ptr = [0]
-    col_idx, vals = [], []
+    rng = np.random.default_rng(seed)
     nnz_target = int(n*n*density)
-    # simple row-wise fill: nnz per row ≈ density * n
+    # simple row-wise fill: nnz per row ≈ density * n (at most n)
     per_row = max(0, nnz_target // n)
     leftover = nnz_target - per_row*n
+    row_nnz = np.full(n, min(per_row, n), dtype=np.int64)
+    row_nnz[:leftover] = min(per_row + 1, n)
+    row_ptr = np.empty(n+1, dtype=np.int64)
+    row_ptr[0] = 0
+    np.cumsum(row_nnz, out=row_ptr[1:])
+    # nnz is known up front, so each row is written in place
+    col_idx = np.empty(row_ptr[-1], dtype=np.int64)
+    vals = np.empty(row_ptr[-1], dtype=dtype)
     for i in range(n):
-        k = per_row + (1 if i < leftover else 0)
+        start, end = row_ptr[i], row_ptr[i+1]
         # choose k distinct columns
-        cols = rnd.sample(range(n), k) if k <= n else list(range(n))
+        cols = col_idx[start:end]
+        cols[:] = rng.choice(n, size=end-start, replace=False)
         cols.sort()
-        for j in cols:
-            col_idx.append(j)
-            vals.append(rnd.random())
-        row_ptr.append(len(col_idx))
+        vals[start:end] = rng.random(end-start, dtype=dtype)
     return row_ptr, col_idx, vals
 
-def matmul_basic(A, B):
-    n = len(A)
-    C = [[0.0]*n for _ in range(n)]
+def basic_backend(dtype):
+    """Kernel matmul_basic runs for this dtype: 'cython' or 'numpy-axpy'."""
+    return "cython" if matmul_blocked_c is not None and np.dtype(dtype) == np.float64 else "numpy-axpy"
+
+def matmul_basic(A, B, BS=64):
+    # C-ordered inputs and output: the Cython kernel takes double[:, ::1] views
+    A = np.ascontiguousarray(A); B = np.ascontiguousarray(B, dtype=A.dtype)
+    n = A.shape[0]
+    C = np.zeros((n, n), dtype=A.dtype)
+    if basic_backend(A.dtype) == "cython":
+        # compiled i-k-j kernel (mm_kernel.pyx); it only handles float64
+        matmul_blocked_c(A, B, C, BS)
+        return C
     for i in range(n):
         Ai, Ci = A[i], C[i]
         for k in range(n):
-            aik = Ai[k]
-            Bk = B[k]
-            for j in range(n):
-                Ci[j] += aik * Bk[j]
+            # row axpy: one vectorized ufunc call instead of the j-loop
+            Ci += Ai[k] * B[k]
     return C
 
-def matmul_transposed(A, B):
-    n = len(A)
-    # pretranspose B to improve locality
-    BT = [[B[j][i] for j in range(n)] for i in range(n)]
-    C = [[0.0]*n for _ in range(n)]
-    for i in range(n):
-        Ai, Ci = A[i], C[i]
-        for j in range(n):
-            btj = BT[j]
-            s = 0.0
-            for k in range(n):
-                s += Ai[k] * btj[k]
-            Ci[j] = s
+def matmul_numpy(A, B):
+    """BLAS-backed multiply; A and B are float32/float64 ndarrays."""
+    return A @ B
+
+def matmul_transposed(A, B, BT=None):
+    # BLAS packs (transposes) the B panels itself, so no explicit BT is built.
+    # A precomputed row-major BT is passed to gemm as BT.T (no copy).
+    A_np = np.asarray(A)
+    if BT is not None:
+        return A_np @ np.asarray(BT, dtype=A_np.dtype).T
+    B_np = np.asarray(B, dtype=A_np.dtype)
+    return A_np @ B_np
+
+def matmul_blocked_jit(A, B, BS):
+    """Tiled multiply of float ndarrays, written for Numba to compile."""
+    n = A.shape[0]
+    C = np.zeros((n, n), dtype=A.dtype)
+    # 3-level tiled multiply; row tiles are split across threads.
+    # prange only takes a constant step, so iterate over tile indices.
+    # Only this outer loop is parallel (nested prange would need the TBB layer).
+    for t in prange((n + BS - 1) // BS):
+        ii = t * BS
+        i_max = min(ii+BS, n)
+        for kk in range(0, n, BS):
+            k_max = min(kk+BS, n)
+            for jj in range(0, n, BS):
+                j_max = min(jj+BS, n)
+                for i in range(ii, i_max):
+                    for k in range(kk, k_max):
+                        aik = A[i, k]
+                        for j in range(jj, j_max):
+                            C[i, j] += aik * B[k, j]
     return C
 
-def matmul_blocked(A, B, BS):
-    n = len(A)
-    C = [[0.0]*n for _ in range(n)]
-    # 3-level tiled multiply
+def matmul_blocked_np(A, B, BS):
+    """Tiled multiply of float ndarrays; the j-loop is a NumPy slice axpy."""
+    n = A.shape[0]
+    C = np.zeros((n, n), dtype=A.dtype)
     for ii in range(0, n, BS):
+        i_max = min(ii+BS, n)
         for kk in range(0, n, BS):
+            k_max = min(kk+BS, n)
             for jj in range(0, n, BS):
-                i_max = min(ii+BS, n)
-                k_max = min(kk+BS, n)
                 j_max = min(jj+BS, n)
                 for i in range(ii, i_max):
-                    Ci = C[i]; Ai = A[i]
+                    Ci = C[i, jj:j_max]  # view: updates land in C
                     for k in range(kk, k_max):
-                        aik = Ai[k]; Bk = B[k]
-                        for j in range(jj, j_max):
-                            Ci[j] += aik * Bk[j]
+                        Ci += A[i, k] * B[k, jj:j_max]
     return C
 
-def spmm_csr_dense(row_ptr, col_idx, vals, B):
-    """C = A_sparse(CSR) @ B_dense; C is dense."""
-    n = len(B[0])        # columns of B
+# Compiled explicit loops beat slice updates under Numba, so the slice
+# kernel is only used when Numba is not installed.
+if njit is not None:
+    matmul_blocked = njit(parallel=True, fastmath=True, boundscheck=False)(matmul_blocked_jit)
+else:
+    matmul_blocked = matmul_blocked_np
+
+def csr_to_scipy(row_ptr, col_idx, vals, n_cols):
+    """Wrap CSR (row_ptr, col_idx, vals) in a scipy.sparse.csr_matrix."""
     m = len(row_ptr)-1   # rows of A
-    C = [[0.0]*n for _ in range(m)]
-    for i in range(m):
-        start, end = row_ptr[i], row_ptr[i+1]
-        Ci = C[i]
-        for p in range(start, end):
-            k = col_idx[p]
-            aik = vals[p]
-            Bk = B[k]
-            for j in range(n):
-                Ci[j] += aik * Bk[j]
-    return C
+    return sp.csr_matrix((np.asarray(vals), np.asarray(col_idx), np.asarray(row_ptr)), shape=(m, n_cols))
+
+def spmm_csr_dense(A, B):
+    """C = A_sparse(CSR) @ B_dense; C is dense. A is a scipy csr_matrix."""
+    return A @ np.asarray(B)
+
+def autotune_bs(n_probe=256, dtype="float64", kernel=None):
+    """Time kernel (default: matmul_blocked) for each BS_CANDIDATES entry on an
+    n_probe matrix and return the fastest block size. Results are cached in
+    BS_CACHE per (CPU, kernel, n_probe, dtype) so the calibration runs once per machine."""
+    kernel = kernel or matmul_blocked
+    key = f"{platform.processor() or platform.machine()}|{kernel.__name__}|{n_probe}|{dtype}"
+    try:
+        with open(BS_CACHE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if key in cache:
+        return cache[key]
+
+    A = gen_dense(n_probe, BASE_SEED, dtype); B = gen_dense(n_probe, BASE_SEED+1, dtype)
+    kernel(A, B, BS_CANDIDATES[0])  # JIT compile / warm up outside the probes
+    best_bs, best_t = None, float("inf")
+    for bs in BS_CANDIDATES:
+        for _ in range(3):
+            t0 = time.perf_counter(); kernel(A, B, bs); t1 = time.perf_counter()
+            if t1 - t0 < best_t:
+                best_bs, best_t = bs, t1 - t0
+
+    cache[key] = best_bs
+    try:
+        with open(BS_CACHE, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"~Could not write {BS_CACHE}: {e}")
+    return best_bs
+
+def block_size(value):
+    """argparse type for --block: a positive int or 'auto'."""
+    if value == "auto":
+        return value
+    bs = int(value)
+    if bs <= 0:
+        raise argparse.ArgumentTypeError("block size must be positive")
+    return bs
 
 def mem_stats(proc):
     rss = proc.memory_info().rss / 1e6
     vms = proc.memory_info().vms / 1e6
     return rss, vms
 
-def run_once(n, algo, BS, density):
-    proc = psutil.Process(os.getpid())
+def run_once(n, algo, BS, density, dtype=np.float64):
     if algo == "sparse":
-        row_ptr, col_idx, vals = gen_sparse_csr(n, density, BASE_SEED)
-        B = gen_dense(n, BASE_SEED+1)
-        t0 = time.perf_counter(); _ = spmm_csr_dense(row_ptr, col_idx, vals, B); t1 = time.perf_counter()
+        row_ptr, col_idx, vals = gen_sparse_csr(n, density, BASE_SEED, dtype)
+        B = gen_dense(n, BASE_SEED+1, dtype)
+        A = csr_to_scipy(row_ptr, col_idx, vals, n)
+        t0 = time.perf_counter(); _ = spmm_csr_dense(A, B); t1 = time.perf_counter()
     elif algo == "blocked":
-        A = gen_dense(n, BASE_SEED); B = gen_dense(n, BASE_SEED+1)
+        A = gen_dense(n, BASE_SEED, dtype); B = gen_dense(n, BASE_SEED+1, dtype)
         t0 = time.perf_counter(); _ = matmul_blocked(A, B, BS); t1 = time.perf_counter()
     elif algo == "transposed":
-        A = gen_dense(n, BASE_SEED); B = gen_dense(n, BASE_SEED+1)
-        t0 = time.perf_counter(); _ = matmul_transposed(A, B); t1 = time.perf_counter()
+        A = gen_dense(n, BASE_SEED, dtype); B = gen_dense(n, BASE_SEED+1, dtype)
+        BT = np.ascontiguousarray(B.T)  # transpose outside the timed region
+        t0 = time.perf_counter(); _ = matmul_transposed(A, B, BT); t1 = time.perf_counter()
+    elif algo == "numpy":
+        A = gen_dense(n, BASE_SEED, dtype); B = gen_dense(n, BASE_SEED+1, dtype)
+        t0 = time.perf_counter(); _ = matmul_numpy(A, B); t1 = time.perf_counter()
     else:
-        A = gen_dense(n, BASE_SEED); B = gen_dense(n, BASE_SEED+1)
-        t0 = time.perf_counter(); _ = matmul_basic(A, B); t1 = time.perf_counter()
+        A = gen_dense(n, BASE_SEED, dtype); B = gen_dense(n, BASE_SEED+1, dtype)
+        t0 = time.perf_counter(); _ = matmul_basic(A, B, BS); t1 = time.perf_counter()
     return (t1 - t0) * 1000.0
 
 def main():
     ap = argparse.ArgumentParser(description="Optimized Matrix Multiply (Python)")
     ap.add_argument("sizes", nargs="+", type=int)
-    ap.add_argument("--algo", choices=["basic","blocked","transposed","sparse"], default="blocked")
+    ap.add_argument("--algo", choices=["basic","blocked","transposed","sparse","numpy"], default="blocked")
     ap.add_argument("-r","--repeats", type=int, default=3)
-    ap.add_argument("--block", type=int, default=64, help="Block size for blocked algo")
+    ap.add_argument("--block", type=block_size, default=64, help="Block size for blocked algo, or 'auto' to calibrate it")
     ap.add_argument("--density", type=float, default=0.05, help="Non-zero density for sparse (0..1)")
+    ap.add_argument("--dtype", choices=["float32","float64"], default="float64", help="Element type of the matrices")
+    ap.add_argument("--mem-pass", action="store_true", help="Run one extra untimed repetition under tracemalloc")
     args = ap.parse_args()
+    dtype = np.dtype(args.dtype)
+
+    if args.block == "auto":
+        if args.algo == "blocked":
+            args.block = autotune_bs(dtype=args.dtype)
+            print(f"! Auto-tuned block size: {args.block}")
+        elif args.algo == "basic" and basic_backend(dtype) == "cython":
+            args.block = autotune_bs(dtype=args.dtype, kernel=matmul_basic)
+            print(f"! Auto-tuned block size: {args.block}")
+        else:
+            # no other algo tiles (numpy-axpy basic ignores BS); record the default
+            args.block = ap.get_default("block")
+
+    if args.algo == "blocked":
+        # compile once up front (per dtype) so JIT time is not counted in the timings
+        warm = np.zeros((args.block, args.block), dtype=dtype)
+        matmul_blocked(warm, warm, args.block)
 
-    tracemalloc.start()
     ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     outname = f"results_python_opt_{args.algo}_{ts}.csv"
-    with open(outname,"w",newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["lang","algo","size","repeats","avg_time_ms","psutil_rss_mb","psutil_vms_mb","tracemalloc_peak_mib","extra"])
-        for n in args.sizes:
-            times = [run_once(n, args.algo, args.block, args.density) for _ in range(args.repeats)]
-            avg_ms = statistics.mean(times)
-            current, peak = tracemalloc.get_traced_memory()
-            proc = psutil.Process(os.getpid()); rss, vms = mem_stats(proc)
-            extra = {"block": args.block, "density": args.density}
-            w.writerow(["python", args.algo, n, args.repeats, f"{avg_ms:.3f}", f"{rss:.2f}", f"{vms:.2f}", f"{peak/(1024*1024):.2f}", extra])
+    header = ["lang","algo","size","repeats","avg_time_ms","psutil_rss_mb","psutil_vms_mb","tracemalloc_peak_mib","extra"]
+    rows = []
+    for n in args.sizes:
+        times = [run_once(n, args.algo, args.block, args.density, dtype) for _ in range(args.repeats)]
+        avg_ms = statistics.mean(times)
+        peak = 0
+        if args.mem_pass:
+            # tracemalloc hooks every allocation, so keep it out of the timed runs
+            tracemalloc.start()
+            run_once(n, args.algo, args.block, args.density, dtype)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        proc = psutil.Process(os.getpid()); rss, vms = mem_stats(proc)
+        extra = {"block": args.block, "density": args.density, "dtype": args.dtype}
+        if args.algo == "basic":
+            extra["backend"] = basic_backend(dtype)
+        rows.append(("python", args.algo, n, args.repeats, f"{avg_ms:.3f}", f"{rss:.2f}", f"{vms:.2f}", f"{peak/(1024*1024):.2f}", extra))
+    pd.DataFrame(rows, columns=header).to_csv(outname, index=False)
     print(f"! Saved {outname}")
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+"""
+Builds the optional Cython kernel (mm_kernel) used by mm_opt.py.
+Usage: python setup.py build_ext --inplace
+"""
+
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+ext = Extension(
+    "mm_kernel",
+    ["mm_kernel.pyx"],
+    extra_compile_args=["-O3", "-march=native", "-funroll-loops", "-ffast-math"],
+)
+
+setup(
+    name="mm_kernel",
+    ext_modules=cythonize([ext], compiler_directives={"language_level": 3}),
+)
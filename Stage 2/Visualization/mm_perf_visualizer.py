@@ -22,6 +22,7 @@ marker_map = {
     "basic": "o",
     "blocked": "s",
     "transposed": "^",
+    "numpy": "D",
     "sparse": "X",
 }
 color_map = {
@@ -46,16 +47,23 @@ if not dfs:
     raise SystemExit("!! No CSV files found.")
 
 data = pd.concat(dfs, ignore_index=True)
-for c in data.columns:
-    if data[c].dtype == object:
-        data[c] = data[c].astype(str).str.replace(",", ".")
-for c in data.columns[2:]:
-    data[c] = pd.to_numeric(data[c], errors="ignore")
+
+def to_numeric(col):
+    """Comma-to-dot fix and numeric conversion in one pass; non-numeric text is kept."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col
+    col = col.astype(str).str.replace(",", ".")
+    try:
+        return pd.to_numeric(col)
+    except (ValueError, TypeError):
+        return col
+
+data[data.columns[2:]] = data[data.columns[2:]].apply(to_numeric)
 if "algo" not in data.columns:
     data["algo"] = "unknown"
 
 # --- Separate dense and sparse ---
-dense_algos = ["basic", "blocked", "transposed"]
+dense_algos = ["basic", "blocked", "transposed", "numpy"]
 dense = data[data["algo"].isin(dense_algos)]
 sparse = data[data["algo"].isin(["sparse"])]
 
@@ -119,7 +127,7 @@ def plot_group(df, title_suffix, fname_prefix):
 
 # === PLOT ===
 if not dense.empty:
-    plot_group(dense, "Dense (basic / blocked / transposed)", "mm_perf_dense")
+    plot_group(dense, "Dense (basic / blocked / transposed / numpy)", "mm_perf_dense")
 
 if not sparse.empty:
     plot_group(sparse, "Sparse (CSR × Dense)", "mm_perf_sparse")
@@ -1,43 +1,35 @@
 import argparse, time, csv, os
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 import multiprocessing as mp
-import random, psutil
+import psutil
+import numpy as np
+from threadpoolctl import threadpool_limits
 
 SEED = 403086
 
 def generate_dense(n):
-    rnd = random.Random(SEED)
-    return [[rnd.random() for _ in range(n)] for __ in range(n)]
+    return np.random.default_rng(SEED).random((n, n), dtype=np.float64)
 
 def worker_chunk(args):
     A_chunk, B, start_i = args
-    C_chunk = []
-    n = len(B)
-    for idx, Ai in enumerate(A_chunk):
-        Ci = [0.0]*n
-        for k in range(n):
-            aik = Ai[k]
-            Bk = B[k]
-            for j in range(n):
-                Ci[j] += aik * Bk[j]
-        C_chunk.append(Ci)
-    return (start_i, C_chunk)
+    return (start_i, np.asarray(A_chunk) @ np.asarray(B))
 
 def parallel_mul(A,B,p):
     n = len(A)
     chunk = n // p
+    # matmul releases the GIL, so threads run the chunks in parallel and
+    # share A and B directly: no pickling and no shared-memory segment
     tasks = []
     for t in range(p):
         i0 = t*chunk
         i1 = n if t==p-1 else (t+1)*chunk
         tasks.append((A[i0:i1], B, i0))
 
-    C = [[0.0]*n for _ in range(n)]
+    C = np.empty((n, n))
 
-    with ProcessPoolExecutor(max_workers=p) as ex:
+    with ThreadPoolExecutor(max_workers=p) as ex:
         for start_i, C_chunk in ex.map(worker_chunk, tasks):
-            for off,row in enumerate(C_chunk):
-                C[start_i+off] = row
+            C[start_i:start_i+C_chunk.shape[0]] = C_chunk
     return C
 
 def main():
@@ -55,33 +47,38 @@ def main():
         T1 = {}
         proc = psutil.Process(os.getpid())
 
-        for n in args.sizes:
-            for r in range(args.repeats):
+        # One BLAS thread per chunk: parallelism comes from the p workers only,
+        # so p workers x BLAS threads never oversubscribe and p=1 is truly serial.
+        # Set once for the whole run, outside every timed call.
+        with threadpool_limits(limits=1, user_api="blas"):
+            for n in args.sizes:
+                # same seed every repeat, so generate the inputs once per size
                 A = generate_dense(n)
                 B = generate_dense(n)
 
-                t0 = time.perf_counter()
-                _ = parallel_mul(A,B,args.threads)
-                t1 = time.perf_counter()
-                dt = (t1-t0)*1000
-
-                # Store baseline
-                if args.threads == 1:
-                    T1[n] = dt
-
-                if args.threads == 1:
-                    speed = 1.0
-                else:
-                    base = T1.get(n, None)
-                    speed = base/dt if base is not None else 1.0
-
-                eff = speed / args.threads
-                rss = proc.memory_info().rss/1e6
-
-                w.writerow([
-                    "python", n, args.threads, args.repeats,
-                    f"{dt:.3f}", f"{speed:.3f}", f"{eff:.3f}", f"{rss:.2f}"
-                ])
+                for r in range(args.repeats):
+                    t0 = time.perf_counter()
+                    _ = parallel_mul(A,B,args.threads)
+                    t1 = time.perf_counter()
+                    dt = (t1-t0)*1000
+
+                    # Store baseline
+                    if args.threads == 1:
+                        T1[n] = dt
+
+                    if args.threads == 1:
+                        speed = 1.0
+                    else:
+                        base = T1.get(n, None)
+                        speed = base/dt if base is not None else 1.0
+
+                    eff = speed / args.threads
+                    rss = proc.memory_info().rss/1e6
+
+                    w.writerow([
+                        "python", n, args.threads, args.repeats,
+                        f"{dt:.3f}", f"{speed:.3f}", f"{eff:.3f}", f"{rss:.2f}"
+                    ])
 
     print("Saved", ts)
 